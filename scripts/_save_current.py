@@ -10,51 +10,60 @@ from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH
+from init_db import DB_PATH, create_schema
+from normalize import normalize_text
+from segments import update_segments
+from terms import update_terms
 
 def save_session_messages(session_key, session_name, messages):
     """Save messages to database"""
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    try:
+        create_schema(conn)
+        cursor = conn.cursor()
     
-    count = 0
-    for msg in messages:
-        timestamp = msg.get("timestamp", 0)
-        if not timestamp:
-            continue
+        count = 0
+        for msg in messages:
+            timestamp = msg.get("timestamp", 0)
+            if not timestamp:
+                continue
             
-        dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
+            dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
         
-        # Extract text content
-        content_parts = msg.get("content", [])
-        text_parts = []
-        for part in content_parts:
-            if isinstance(part, dict) and part.get("type") == "text":
-                text_parts.append(part.get("text", ""))
-        content = "\n".join(text_parts) if text_parts else ""
+            # Extract text content
+            content_parts = msg.get("content", [])
+            text_parts = []
+            for part in content_parts:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    text_parts.append(part.get("text", ""))
+            content = "\n".join(text_parts) if text_parts else ""
         
-        if not content.strip():
-            continue
+            if not content.strip():
+                continue
         
-        cursor.execute('''
-            INSERT OR IGNORE INTO messages 
-            (session_key, session_name, timestamp, datetime, role, author, content, message_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session_key,
-            session_name,
-            timestamp,
-            dt,
-            msg.get("role", "unknown"),
-            msg.get("author", ""),
-            content,
-            msg.get("messageId", "")
-        ))
-        count += 1
+            cursor.execute('''
+                INSERT OR IGNORE INTO messages 
+                (session_key, session_name, timestamp, datetime, role, author, content, message_id, content_norm)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                session_key,
+                session_name,
+                timestamp,
+                dt,
+                msg.get("role", "unknown"),
+                msg.get("author", ""),
+                content,
+                msg.get("messageId", ""),
+                normalize_text(content)
+            ))
+            count += 1
     
-    conn.commit()
-    conn.close()
-    return count
+        update_segments(conn)
+        update_terms(conn)
+        conn.commit()
+        return count
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     # Session data from sessions_history
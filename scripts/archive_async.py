@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+异步 API：供 OpenClaw agent 运行时在事件循环中直接调用
+
+写入在单独的写线程中串行执行，查询在小型读线程池中执行，事件循环不会被阻塞。
+被取消或超时的操作如果还在排队就直接撤销；已经开始的查询会被中断，已经开始的写入会完整提交。
+
+Usage:
+    from archive_async import AsyncArchive
+
+    async with AsyncArchive() as archive:
+        await archive.save(session_key, session_name, messages)
+        results = await archive.search("部署", days=7, timeout=5)
+        async for msg in archive.iter_search("会议"):
+            ...
+        await archive.export("backup.md", days=30)
+        stats = await archive.stats()
+"""
+
+import asyncio
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from init_db import DB_PATH, create_schema
+from auto_save import save_messages_batch
+from realtime_save import save_message_file
+from search_chat import build_search_query
+from export_chat import build_export_query, write_export
+from stats import collect_stats
+
+class AsyncArchive:
+    """聊天记录存档的异步封装"""
+
+    def __init__(self, readers: int = 4):
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-archive-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="chat-archive-reader")
+        self._schema_ready = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """等待进行中的写入完成后关闭线程池"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._writer.shutdown)
+        await loop.run_in_executor(None, self._readers.shutdown)
+
+    def _submit(self, executor, func, *args):
+        """提交到线程池，返回 (线程池 Future, asyncio Future)
+
+        前者用于撤销还在排队的任务；调用方放弃等待后，线程中的异常由回调取走，
+        避免 "exception was never retrieved" 警告。
+        """
+        future = executor.submit(func, *args)
+        waiter = asyncio.wrap_future(future)
+        waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return future, waiter
+
+    def _connect(self):
+        # 连接会在读线程和事件循环线程之间传递，但同一时刻只有一个线程使用
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    async def _interruptible(self, conn, func, *args, timeout: float = None):
+        """在读线程池中执行 func(*args)，取消或超时时中断 conn 上的查询
+
+        还在排队的查询直接撤销；已经开始的查询通过进度回调和 interrupt() 中断，
+        并等到工作线程真正退出后再把异常抛给调用方，保证之后可以安全关闭连接。
+        """
+        cancelled = threading.Event()
+        # 线程刚开始、语句还没执行时 interrupt() 不起作用，由进度回调补上
+        conn.set_progress_handler(cancelled.is_set, 1000)
+        future, waiter = self._submit(self._readers, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if not future.cancel():
+                cancelled.set()
+                conn.interrupt()
+                await asyncio.wait([waiter])
+            raise
+
+    async def _ensure_schema(self, timeout: float = None):
+        """首次查询前在写线程中补齐旧版数据库的表和字段"""
+        if self._schema_ready:
+            return
+
+        def run():
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                create_schema(conn)
+            finally:
+                conn.close()
+
+        await self._write(run, timeout=timeout)
+        self._schema_ready = True
+
+    async def _query(self, func, timeout: float = None):
+        """用一个新连接执行 func(conn)；timeout 同时覆盖首次查询前的建表检查"""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        await self._ensure_schema(timeout)
+        if deadline is not None:
+            timeout = max(deadline - loop.time(), 0)
+        conn = self._connect()
+        try:
+            return await self._interruptible(conn, func, conn, timeout=timeout)
+        finally:
+            conn.close()
+
+    async def _write(self, func, *args, timeout: float = None):
+        """在写线程中执行写入
+
+        取消或超时时，还在排队的写入会被撤销、不会再执行；
+        已经开始的写入会在后台完整提交，不会留下半批数据。
+        """
+        future, waiter = self._submit(self._writer, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            future.cancel()
+            raise
+
+    async def save(self, session_key: str, session_name: str, messages: list, timeout: float = None):
+        """批量保存消息（自动去重），返回新保存的条数"""
+        return await self._write(save_messages_batch, session_key, session_name, messages, timeout=timeout)
+
+    async def save_file(self, session_key: str, session_name: str, filepath: str, timeout: float = None):
+        """流式保存消息文件，返回 (读取条数, 保存条数)"""
+        return await self._write(save_message_file, session_key, session_name, filepath, timeout=timeout)
+
+    async def search(
+        self,
+        keyword: str,
+        days: int = None,
+        session_key: str = None,
+        limit: int = 50,
+        timeout: float = None
+    ):
+        """搜索消息，返回结果列表"""
+        query, params = build_search_query(keyword, days, session_key, limit)
+
+        def run(conn):
+            return [dict(row) for row in conn.execute(query, params)]
+
+        return await self._query(run, timeout=timeout)
+
+    async def iter_search(
+        self,
+        keyword: str,
+        days: int = None,
+        session_key: str = None,
+        limit: int = None,
+        page_size: int = 200,
+        timeout: float = None
+    ):
+        """逐条异步产出搜索结果，每次从数据库取 page_size 条
+
+        每一页都是独立读完的查询，从上一页最后一条的 (timestamp, id) 之后继续，
+        调用方处理结果期间不持有读事务，不会阻塞写入。timeout 作用于每一页的读取。
+        """
+        before = None
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            query, params = build_search_query(keyword, days, session_key, size, before=before)
+
+            def run(conn):
+                return [dict(row) for row in conn.execute(query, params)]
+
+            rows = await self._query(run, timeout=timeout)
+            for row in rows:
+                yield row
+            if len(rows) < size:
+                break
+            before = (rows[-1]['timestamp'], rows[-1]['id'])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    async def export(
+        self,
+        output_path: str,
+        days: int = None,
+        session_key: str = None,
+        limit: int = 500,
+        format_type: str = "markdown",
+        timeout: float = None
+    ):
+        """导出消息到文件，返回导出条数"""
+        query, params = build_export_query(days, session_key, limit)
+
+        def run(conn):
+            return [dict(row) for row in conn.execute(query, params)]
+
+        results = await self._query(run, timeout=timeout)
+        # 按时间正序排列
+        results.reverse()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._readers, write_export, results, output_path, format_type)
+        return len(results)
+
+    async def stats(self, timeout: float = None):
+        """获取存档统计信息"""
+        return await self._query(collect_stats, timeout=timeout)
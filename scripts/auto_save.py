@@ -15,7 +15,10 @@ from datetime import datetime
 
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH, init_db
+from init_db import DB_PATH, create_schema, init_db
+from normalize import normalize_text
+from segments import update_segments
+from terms import update_terms
 
 
 def get_last_saved_timestamp(session_key):
@@ -44,60 +47,66 @@ def save_messages_batch(session_key, session_name, messages):
         init_db()
     
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    try:
+        create_schema(conn)
+        cursor = conn.cursor()
     
-    saved_count = 0
+        saved_count = 0
     
-    for msg in messages:
-        # 提取文本内容
-        content_parts = msg.get("content", [])
-        text_parts = []
-        for part in content_parts:
-            if isinstance(part, dict) and part.get("type") == "text":
-                text = part.get("text", "").strip()
-                if text:
-                    text_parts.append(text)
+        for msg in messages:
+            # 提取文本内容
+            content_parts = msg.get("content", [])
+            text_parts = []
+            for part in content_parts:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    text = part.get("text", "").strip()
+                    if text:
+                        text_parts.append(text)
         
-        content = "\n".join(text_parts).strip()
-        if not content:
-            continue
+            content = "\n".join(text_parts).strip()
+            if not content:
+                continue
             
-        # 排除系统消息和太短的回复
-        if len(content) < 10 or content.startswith("System:"):
-            continue
+            # 排除系统消息和太短的回复
+            if len(content) < 10 or content.startswith("System:"):
+                continue
         
-        timestamp = msg.get("timestamp", 0)
+            timestamp = msg.get("timestamp", 0)
         
-        # 检查是否已存在
-        cursor.execute('''
-            SELECT 1 FROM messages 
-            WHERE session_key = ? AND timestamp = ? AND content = ?
-        ''', (session_key, timestamp, content))
+            # 检查是否已存在
+            cursor.execute('''
+                SELECT 1 FROM messages 
+                WHERE session_key = ? AND timestamp = ? AND content = ?
+            ''', (session_key, timestamp, content))
         
-        if cursor.fetchone():
-            continue  # 已存在，跳过
+            if cursor.fetchone():
+                continue  # 已存在，跳过
         
-        # 插入新消息
-        dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute('''
-            INSERT INTO messages 
-            (session_key, session_name, timestamp, datetime, role, author, content, message_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session_key,
-            session_name,
-            timestamp,
-            dt,
-            msg.get("role", "unknown"),
-            msg.get("author", "system"),
-            content,
-            msg.get("messageId", "")
-        ))
-        saved_count += 1
+            # 插入新消息
+            dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
+            cursor.execute('''
+                INSERT INTO messages 
+                (session_key, session_name, timestamp, datetime, role, author, content, message_id, content_norm)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                session_key,
+                session_name,
+                timestamp,
+                dt,
+                msg.get("role", "unknown"),
+                msg.get("author", "system"),
+                content,
+                msg.get("messageId", ""),
+                normalize_text(content)
+            ))
+            saved_count += 1
     
-    conn.commit()
-    conn.close()
-    return saved_count
+        update_segments(conn)
+        update_terms(conn)
+        conn.commit()
+        return saved_count
+    finally:
+        conn.close()
 
 
 def main():
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+备份聊天记录数据库
+
+Usage:
+    python3 backup.py --output backup.db          # 在线整库备份（写入方可继续写）
+    python3 backup.py --standby standby.db        # 增量同步新消息到备库并校验
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+from init_db import DB_PATH, create_schema
+
+# 不参与校验的字段：由 content 派生的 content_norm、记录入库时间的 created_at，
+# 其余同步的字段全部参与
+CHECKSUM_EXCLUDED = {'content_norm', 'created_at'}
+
+def backup_database(output_path: str, pages: int = 256, sleep: float = 0.05):
+    """使用 SQLite 在线备份 API 分步复制整个数据库
+
+    每复制 pages 页后让出 sleep 秒，避免长时间阻塞写入方。
+    先写入临时文件，完成后再原子替换目标文件。
+    """
+    tmp_path = f"{output_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    src = sqlite3.connect(DB_PATH)
+    dst = sqlite3.connect(tmp_path)
+
+    def progress(status, remaining, total):
+        done = total - remaining
+        percent = done * 100 // total if total else 100
+        print(f"\r   {done}/{total} 页 ({percent}%)", end="", flush=True)
+
+    completed = False
+    try:
+        src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+        completed = True
+    finally:
+        dst.close()
+        src.close()
+        # 备份失败时不留下不完整的临时文件
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print()
+
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path)
+
+def table_columns(conn, table: str) -> list:
+    """获取表的字段列表"""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+def day_range(day: str):
+    """返回某天（本地时间）的毫秒时间戳区间 [start, end)"""
+    start = datetime.strptime(day, "%Y-%m-%d")
+    end = start + timedelta(days=1)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+def partition_checksum(conn, day: str, max_id: int, columns: list) -> str:
+    """计算某天（id 不超过 max_id）所有消息在 columns 上的校验和"""
+    start, end = day_range(day)
+    digest = hashlib.sha256()
+    cursor = conn.execute(f'''
+        SELECT {', '.join(columns)} FROM messages
+        WHERE timestamp >= ? AND timestamp < ? AND id <= ?
+        ORDER BY id
+    ''', (start, end, max_id))
+    for row in cursor:
+        digest.update(repr(row).encode('utf-8'))
+    return digest.hexdigest()
+
+def sync_standby(standby_path: str, batch_size: int = 1000):
+    """把备库中没有的新消息（按 rowid）复制过去，并按天校验
+
+    备库自身的 MAX(id) 即同步游标，中断后重新运行会从断点继续。
+    只有本次涉及的日期会被校验，开销与当天新增量成正比。
+    """
+    src = sqlite3.connect(DB_PATH)
+    dst = sqlite3.connect(standby_path)
+    create_schema(dst)
+
+    # 只复制两边都有的字段，兼容版本不一致的备库
+    dst_columns = set(table_columns(dst, 'messages'))
+    columns = [c for c in table_columns(src, 'messages') if c in dst_columns]
+    column_list = ', '.join(columns)
+    placeholders = ', '.join('?' for _ in columns)
+    day_index = columns.index('datetime')
+
+    last_id = dst.execute('SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()[0]
+    start_id = last_id
+    copied = 0
+    days = set()
+
+    while True:
+        rows = src.execute(f'''
+            SELECT {column_list} FROM messages
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+
+        dst.executemany(
+            f'INSERT INTO messages ({column_list}) VALUES ({placeholders})',
+            rows
+        )
+        dst.commit()
+
+        last_id = rows[-1][0]
+        copied += len(rows)
+        days.update(row[day_index][:10] for row in rows)
+        print(f"\r   已同步 {copied} 条", end="", flush=True)
+    if copied:
+        print()
+
+    checksum_columns = [c for c in columns if c not in CHECKSUM_EXCLUDED]
+    mismatched = []
+    for day in sorted(days):
+        if partition_checksum(src, day, last_id, checksum_columns) != partition_checksum(dst, day, last_id, checksum_columns):
+            mismatched.append(day)
+
+    src.close()
+    dst.close()
+    return {
+        "from_id": start_id,
+        "to_id": last_id,
+        "copied": copied,
+        "days": sorted(days),
+        "mismatched": mismatched
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="备份聊天记录数据库")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--output", type=str, help="在线整库备份的输出文件")
+    mode.add_argument("--standby", type=str, help="增量同步的备库文件")
+    parser.add_argument("--pages", type=int, default=256, help="整库备份每步复制的页数")
+    parser.add_argument("--sleep", type=float, default=0.05, help="整库备份每步之间让出的秒数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="增量同步每批消息数")
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return 1
+
+    if args.output:
+        print(f"💾 在线备份: {DB_PATH} -> {args.output}")
+        size = backup_database(args.output, pages=args.pages, sleep=args.sleep)
+        print(f"✅ 备份完成 ({size:,} 字节)")
+        return 0
+
+    print(f"🔁 增量同步: {DB_PATH} -> {args.standby}")
+    result = sync_standby(args.standby, batch_size=args.batch_size)
+    if not result["copied"]:
+        print("✅ 备库已是最新")
+        return 0
+
+    print(f"📦 同步 id {result['from_id'] + 1} ~ {result['to_id']}，共 {result['copied']} 条")
+    print(f"🔎 校验日期: {', '.join(result['days'])}")
+    if result["mismatched"]:
+        print(f"❌ 校验不一致: {', '.join(result['mismatched'])}")
+        return 1
+
+    print("✅ 校验通过")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
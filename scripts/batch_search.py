@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+批量关键词搜索（一次扫描匹配多个关键词）
+
+Usage:
+    python3 batch_search.py keywords.txt                    # 扫描全部消息
+    python3 batch_search.py keywords.txt --incremental      # 只扫描上次运行后新增的消息
+    python3 batch_search.py keywords.txt --output hits.json # 保存命中的消息 id
+    python3 batch_search.py keywords.txt --workers 8        # 8 个进程并行扫描
+
+关键词文件每行一个关键词，空行和以 # 开头的行会被忽略。
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent))
+from init_db import DB_PATH, create_schema, get_meta, set_meta
+from normalize import normalize_text
+
+# 每个并行任务负责的 rowid 区间大小
+RANGE_SIZE = 20000
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机"""
+
+    def __init__(self, patterns: list):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].add(index)
+
+        # 广度优先构建失败指针
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> set:
+        """返回文本中出现过的模式编号"""
+        found = set()
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+def load_keywords(filepath: str) -> list:
+    """读取关键词文件（去重并保持顺序）"""
+    keywords = []
+    seen = set()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            keyword = line.strip()
+            if not keyword or keyword.startswith('#'):
+                continue
+            if normalize_text(keyword) in seen:
+                continue
+            seen.add(normalize_text(keyword))
+            keywords.append(keyword)
+    return keywords
+
+_matcher = None
+
+def _init_worker(keywords: list):
+    """子进程初始化：每个进程只构建一次自动机"""
+    global _matcher
+    _matcher = AhoCorasick([normalize_text(kw) for kw in keywords])
+
+def _scan_range(id_range: tuple) -> dict:
+    """扫描 (start, end] 区间内的消息，返回 {关键词编号: [消息 id]}"""
+    start, end = id_range
+    conn = sqlite3.connect(DB_PATH)
+    hits = {}
+    cursor = conn.execute('''
+        SELECT id, content, content_norm FROM messages
+        WHERE id > ? AND id <= ?
+    ''', (start, end))
+    for message_id, content, content_norm in cursor:
+        for index in _matcher.search(content_norm or normalize_text(content)):
+            hits.setdefault(index, []).append(message_id)
+    conn.close()
+    return hits
+
+def batch_search(
+    keywords: list,
+    since_id: int = 0,
+    workers: int = None,
+    range_size: int = RANGE_SIZE
+):
+    """对 since_id 之后的消息做一次多关键词扫描
+
+    返回 (结果, 扫描到的最大 id)，结果为 {关键词: [消息 id]}。
+    """
+    conn = sqlite3.connect(DB_PATH)
+    max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()[0]
+    conn.close()
+
+    ranges = [
+        (start, min(start + range_size, max_id))
+        for start in range(since_id, max_id, range_size)
+    ]
+
+    workers = workers or cpu_count()
+    merged = {}
+    if workers <= 1 or len(ranges) <= 1:
+        _init_worker(keywords)
+        partials = map(_scan_range, ranges)
+        for partial in partials:
+            for index, ids in partial.items():
+                merged.setdefault(index, []).extend(ids)
+    else:
+        with Pool(min(workers, len(ranges)), initializer=_init_worker, initargs=(keywords,)) as pool:
+            for partial in pool.imap_unordered(_scan_range, ranges):
+                for index, ids in partial.items():
+                    merged.setdefault(index, []).extend(ids)
+
+    results = {keyword: sorted(merged.get(index, [])) for index, keyword in enumerate(keywords)}
+    return results, max_id
+
+def main():
+    parser = argparse.ArgumentParser(description="批量关键词搜索")
+    parser.add_argument("keyword_file", help="关键词文件（每行一个）")
+    parser.add_argument("--incremental", action="store_true", help="只扫描上次运行后新增的消息")
+    parser.add_argument("--name", type=str, default="default", help="增量游标名称")
+    parser.add_argument("--workers", type=int, help="并行进程数（默认 CPU 核数）")
+    parser.add_argument("--output", type=str, help="保存命中结果到 JSON 文件")
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return 1
+
+    keywords = load_keywords(args.keyword_file)
+    if not keywords:
+        print("❌ 关键词文件为空")
+        return 1
+
+    meta_key = f"batch:{args.name}"
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    since_id = int(get_meta(conn, meta_key, 0)) if args.incremental else 0
+    conn.close()
+
+    print(f"🔍 批量搜索 {len(keywords)} 个关键词")
+    if since_id:
+        print(f"📌 从消息 id {since_id} 之后开始扫描")
+
+    results, max_id = batch_search(keywords, since_id=since_id, workers=args.workers)
+
+    hit_keywords = [(kw, ids) for kw, ids in results.items() if ids]
+    hit_keywords.sort(key=lambda item: len(item[1]), reverse=True)
+    print(f"\n✅ 扫描至消息 id {max_id}，{len(hit_keywords)} 个关键词有命中\n")
+    for keyword, ids in hit_keywords:
+        print(f"   {keyword}: {len(ids):,}")
+
+    if args.output:
+        data = {
+            "search_time": datetime.now().isoformat(),
+            "since_id": since_id,
+            "max_id": max_id,
+            "results": {kw: {"count": len(ids), "message_ids": ids} for kw, ids in results.items()}
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 已导出到: {args.output}")
+
+    if args.incremental:
+        conn = sqlite3.connect(DB_PATH)
+        set_meta(conn, meta_key, max_id)
+        conn.commit()
+        conn.close()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
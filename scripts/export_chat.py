@@ -8,6 +8,7 @@ Usage:
     python3 export_chat.py --output chat.md   # 指定输出文件
     python3 export_chat.py --session KEY      # 导出指定会话
     python3 export_chat.py --format json      # JSON格式
+    python3 export_chat.py --segment 42       # 导出一段对话（见 segments.py）
 """
 
 import argparse
@@ -18,20 +19,15 @@ from pathlib import Path
 from datetime import datetime, timedelta
 
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH
+from init_db import DB_PATH, create_schema
+from segments import get_segment
 
-def export_messages(
-    output_path: str,
+def build_export_query(
     days: int = None,
     session_key: str = None,
-    limit: int = 500,
-    format_type: str = "markdown"
+    limit: int = 500
 ):
-    """导出消息"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
+    """构造导出 SQL，返回 (query, params)"""
     query = 'SELECT * FROM messages WHERE 1=1'
     params = []
     
@@ -48,6 +44,28 @@ def export_messages(
     query += ' ORDER BY timestamp DESC LIMIT ?'
     params.append(limit)
     
+    return query, params
+
+def write_export(results: list, output_path: str, format_type: str = "markdown"):
+    """按格式写出导出文件"""
+    if format_type == "json":
+        export_json(results, output_path)
+    else:
+        export_markdown(results, output_path)
+
+def export_messages(
+    output_path: str,
+    days: int = None,
+    session_key: str = None,
+    limit: int = 500,
+    format_type: str = "markdown"
+):
+    """导出消息"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    query, params = build_export_query(days, session_key, limit)
     cursor.execute(query, params)
     results = [dict(row) for row in cursor.fetchall()]
     conn.close()
@@ -55,10 +73,32 @@ def export_messages(
     # 按时间正序排列
     results.reverse()
     
-    if format_type == "json":
-        export_json(results, output_path)
-    else:
-        export_markdown(results, output_path)
+    write_export(results, output_path, format_type)
+    
+    return len(results)
+
+def export_segment(
+    output_path: str,
+    segment_id: int,
+    format_type: str = "markdown"
+):
+    """导出一段对话（按会话 + 时间范围走索引查询）"""
+    segment = get_segment(segment_id)
+    if not segment:
+        return None
+    
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT * FROM messages
+        WHERE session_key = ? AND timestamp BETWEEN ? AND ?
+        ORDER BY timestamp
+    ''', (segment['session_key'], segment['start_ts'], segment['end_ts']))
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    
+    write_export(results, output_path, format_type)
     
     return len(results)
 
@@ -103,6 +143,7 @@ def main():
     parser.add_argument("--session", type=str, help="指定会话")
     parser.add_argument("--limit", type=int, default=500, help="消息数量限制")
     parser.add_argument("--format", choices=["markdown", "json"], default="markdown", help="格式")
+    parser.add_argument("--segment", type=int, help="导出指定对话段（见 segments.py）")
     args = parser.parse_args()
     
     if not DB_PATH.exists():
@@ -110,6 +151,26 @@ def main():
         print("请先运行: python3 init_db.py")
         return 1
     
+    # 旧版数据库补齐新增的表和字段
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    conn.close()
+    
+    if args.segment:
+        print(f"📤 导出对话段 {args.segment}...")
+        print(f"💾 输出文件: {args.output}")
+        count = export_segment(
+            output_path=args.output,
+            segment_id=args.segment,
+            format_type=args.format
+        )
+        if count is None:
+            print(f"❌ 对话段不存在: {args.segment}")
+            print("分段合并或重建后 id 会变化，请先运行 python3 segments.py 查看最新的 id")
+            return 1
+        print(f"✅ 成功导出 {count} 条消息")
+        return 0
+    
     print(f"📤 导出聊天记录...")
     if args.days:
         print(f"📅 时间范围: 最近 {args.days} 天")
@@ -29,11 +29,11 @@ from pathlib import Path
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "chat_archive.db"
 
-def init_db():
-    """初始化数据库"""
-    DATA_DIR.mkdir(exist_ok=True)
-    
-    conn = sqlite3.connect(DB_PATH)
+# content_norm 回填完成的标记
+NORM_BACKFILL_KEY = "normalize:backfilled"
+
+def create_schema(conn):
+    """创建表和索引（可重复执行）"""
     cursor = conn.cursor()
     
     # 创建消息表
@@ -48,16 +48,97 @@ def init_db():
             author TEXT,
             content TEXT NOT NULL,
             message_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            content_norm TEXT
         )
     ''')
     
+    # 旧版数据库补充归一化内容字段（在本函数末尾自动回填）
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(messages)')]
+    if 'content_norm' not in columns:
+        cursor.execute('ALTER TABLE messages ADD COLUMN content_norm TEXT')
+    
     # 创建索引
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_session ON messages(session_key)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON messages(timestamp)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_content ON messages(content)')
+    # LIKE '%关键词%' 无法使用 B-tree 索引，content_norm 不建索引以免重复存储每条消息
+    cursor.execute('DROP INDEX IF EXISTS idx_content_norm')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_timestamp ON messages(session_key, timestamp)')
+    
+    # messages.id 为 AUTOINCREMENT，按提交顺序单调递增，增量消费者直接以 id 作为游标
+    # 早期版本的变更日志与 id 一一对应且不会清理，这里移除
+    cursor.execute('DROP TRIGGER IF EXISTS trg_messages_log')
+    cursor.execute('DROP TABLE IF EXISTS message_log')
+    
+    # 对话分段：按空闲间隔切分的会话片段，由 segments.update_segments() 增量维护
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_key TEXT NOT NULL,
+            session_name TEXT,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL,
+            start_datetime TEXT NOT NULL,
+            end_datetime TEXT NOT NULL,
+            message_count INTEGER NOT NULL,
+            participants TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_segments_session_end ON segments(session_key, end_ts)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_segments_start ON segments(start_ts)')
+    
+    # 词频索引：按 (日期, 会话) 统计的词/汉字二元组次数，由 terms.update_terms() 增量维护
+    # 过期的日期会被压缩为 session_key = '*' 的汇总行
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS term_counts (
+            day TEXT NOT NULL,
+            session_key TEXT NOT NULL,
+            term TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (day, session_key, term)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_term_counts_term ON term_counts(term, day)')
+    
+    # 元数据：游标位置等键值
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
     
     conn.commit()
+    
+    # 升级前的消息没有归一化内容，一次性分批回填，完成后记录标记
+    if get_meta(conn, NORM_BACKFILL_KEY) is None:
+        from normalize import backfill_rows  # 延迟导入：normalize 依赖本模块
+        backfill_rows(conn)
+        set_meta(conn, NORM_BACKFILL_KEY, 1)
+        conn.commit()
+
+def get_meta(conn, key: str, default=None):
+    """读取元数据"""
+    row = conn.execute('SELECT value FROM archive_meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else default
+
+def set_meta(conn, key: str, value):
+    """写入元数据（不提交，由调用方决定事务边界）"""
+    conn.execute('''
+        INSERT INTO archive_meta (key, value, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    ''', (key, str(value)))
+
+def init_db():
+    """初始化数据库"""
+    DATA_DIR.mkdir(exist_ok=True)
+    
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
     conn.close()
     print(f"✅ 数据库初始化完成: {DB_PATH}")
 
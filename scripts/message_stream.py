@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+流式读取消息文件（JSON 数组 / NDJSON），内存占用与文件大小无关
+
+文件通过 mmap 映射，每次只解析一条消息，适合几百 MB 的 sessions_history 导出。
+格式错误的记录会带字节偏移报告并跳过。
+
+Usage:
+    python3 message_stream.py history.json          # 检查文件，统计消息数和错误
+    python3 message_stream.py history.ndjson
+"""
+
+import codecs
+import json
+import mmap
+import re
+import sys
+from itertools import islice
+
+WHITESPACE = re.compile(rb'[ \t\r\n]*')
+# 容器内部需要关注的字符：括号和字符串起点
+STRUCTURAL = re.compile(rb'[\[\]{}"]')
+# 从字符串开引号之后匹配到闭引号（处理转义）
+STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# 标量值（数字、true/false/null）
+SCALAR = re.compile(rb'[^,\]}\s]+')
+
+# 快速路径每次最多解码的字节数，更大的记录改用括号匹配
+MAX_RECORD = 4096
+
+DECODER = json.JSONDecoder()
+
+class StreamError(ValueError):
+    """文件结构损坏、无法继续解析"""
+
+    def __init__(self, offset: int, message: str):
+        super().__init__(f"第 {offset} 字节: {message}")
+        self.offset = offset
+        self.reason = message
+
+def report_error(offset: int, message: str):
+    """默认的错误报告：输出到 stderr"""
+    print(f"⚠️ 第 {offset} 字节: {message}", file=sys.stderr)
+
+def skip_whitespace(buf, pos: int) -> int:
+    return WHITESPACE.match(buf, pos).end()
+
+def find_value_end(buf, pos: int, limit: int = None) -> int:
+    """返回从 pos 开始的一个 JSON 值的结束位置（不解析内容）
+
+    limit 限定只在 [pos, limit) 内查找，值在此之前没有结束时抛出 StreamError。
+    """
+    if limit is None:
+        limit = len(buf)
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        match = STRING_BODY.match(buf, pos + 1, limit)
+        if not match:
+            raise StreamError(pos, "字符串没有结束")
+        return match.end()
+
+    if first not in (b'{', b'['):
+        match = SCALAR.match(buf, pos, limit)
+        if not match:
+            raise StreamError(pos, "无法识别的值")
+        return match.end()
+
+    depth = 0
+    cursor = pos
+    while True:
+        match = STRUCTURAL.search(buf, cursor, limit)
+        if not match:
+            raise StreamError(pos, "对象或数组没有结束")
+        char = match.group()
+        if char == b'"':
+            string_end = STRING_BODY.match(buf, match.end(), limit)
+            if not string_end:
+                raise StreamError(match.start(), "字符串没有结束")
+            cursor = string_end.end()
+            continue
+        cursor = match.end()
+        if char in (b'{', b'['):
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return cursor
+
+def decode_record(buf, start: int, end: int, on_error):
+    """解析一条记录，不是消息对象时报告错误并返回 None"""
+    try:
+        record = json.loads(buf[start:end])
+    except ValueError as e:
+        on_error(start, f"JSON 格式错误: {e}")
+        return None
+    if not isinstance(record, dict):
+        on_error(start, f"不是消息对象: {type(record).__name__}")
+        return None
+    return record
+
+def try_decode(buf, pos: int, limit: int = None):
+    """快速路径：只解码 pos 之后 MAX_RECORD 字节（且不超过 limit），在其中解析一个对象
+
+    开销与对象后面还有多少内容、是否换行无关。
+    成功返回 (记录, 结束位置)，否则返回 None，由调用方按括号匹配处理并报告错误。
+    """
+    if buf[pos:pos + 1] != b'{':
+        return None
+    try:
+        # 非 final 解码：忽略窗口末尾被截断的多字节字符
+        window_end = pos + MAX_RECORD if limit is None else min(pos + MAX_RECORD, limit)
+        text = codecs.getincrementaldecoder('utf-8')().decode(buf[pos:window_end])
+        record, index = DECODER.raw_decode(text)
+    except ValueError:
+        return None
+    return record, pos + len(text[:index].encode('utf-8'))
+
+def iter_array(buf, pos: int, on_error):
+    """逐条读取 JSON 数组中的元素，pos 指向 '[' 之后"""
+    pos = skip_whitespace(buf, pos)
+    if buf[pos:pos + 1] == b']':
+        return
+    while True:
+        parsed = try_decode(buf, pos)
+        if parsed:
+            record, end = parsed
+        else:
+            end = find_value_end(buf, pos)
+            record = decode_record(buf, pos, end, on_error)
+        if record is not None:
+            yield record
+
+        pos = skip_whitespace(buf, end)
+        separator = buf[pos:pos + 1]
+        if separator == b']':
+            return
+        if separator != b',':
+            raise StreamError(pos, "数组元素之间缺少 ','")
+        pos = skip_whitespace(buf, pos + 1)
+
+def next_line(buf, pos: int) -> int:
+    """pos 所在行的行尾（没有换行时为文件末尾）"""
+    line_end = buf.find(b'\n', pos)
+    return len(buf) if line_end == -1 else line_end
+
+def iter_lines(buf, pos: int, on_error):
+    """逐条读取 NDJSON（同一行内也可以拼接多个对象）
+
+    每条记录只在所在行内查找结尾：截断的行不会吞掉后面的行，
+    出错时的开销也只与这一行的长度有关。
+    """
+    size = len(buf)
+    line_end = -1
+    while True:
+        pos = skip_whitespace(buf, pos)
+        if pos >= size:
+            return
+        if pos > line_end:
+            line_end = next_line(buf, pos)
+
+        parsed = try_decode(buf, pos, line_end)
+        if parsed:
+            record, end = parsed
+        else:
+            # 不是对象或超出快速路径窗口时在行内按括号匹配找到结尾，出错则跳过这一行
+            try:
+                end = find_value_end(buf, pos, line_end)
+                record = json.loads(buf[pos:end])
+            except StreamError as e:
+                on_error(e.offset, e.reason)
+                pos = line_end
+                continue
+            except ValueError as e:
+                on_error(pos, f"JSON 格式错误: {e}")
+                pos = line_end
+                continue
+
+        if isinstance(record, dict):
+            yield record
+        else:
+            on_error(pos, f"不是消息对象: {type(record).__name__}")
+        pos = end
+
+def single_value_end(buf, pos: int):
+    """文件从 pos 起只有一个（可以跨多行的）值时返回其结束位置，否则返回 None
+
+    NDJSON 文件只会扫描到第一条记录的结尾。
+    """
+    try:
+        end = find_value_end(buf, pos)
+    except StreamError:
+        return None
+    return end if skip_whitespace(buf, end) >= len(buf) else None
+
+def iter_messages(filepath: str, on_error=report_error):
+    """逐条产出文件中的消息 dict
+
+    以 '[' 开头的文件按 JSON 数组解析；只包含一个值的文件（如格式化过的单条消息）
+    整体解析；其余按 NDJSON 逐行解析。
+    单条记录的错误通过 on_error(offset, message) 报告后跳过；
+    整体结构损坏时抛出 StreamError。
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(0, 2)
+        if f.tell() == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            # 顺序读取，已读过的页可以尽早被系统回收
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                buf.madvise(mmap.MADV_SEQUENTIAL)
+            pos = skip_whitespace(buf, 0)
+            if buf[:3] == b'\xef\xbb\xbf':
+                pos = skip_whitespace(buf, 3)
+            if buf[pos:pos + 1] == b'[':
+                yield from iter_array(buf, pos + 1, on_error)
+                return
+            end = single_value_end(buf, pos)
+            if end is not None:
+                try:
+                    record = json.loads(buf[pos:end])
+                except ValueError:
+                    # 首行截断而括号恰好在文件末尾闭合时也会走到这里，交给逐行解析
+                    record = None
+                if isinstance(record, dict):
+                    yield record
+                    return
+                if record is not None:
+                    on_error(pos, f"不是消息对象: {type(record).__name__}")
+                    return
+            yield from iter_lines(buf, pos, on_error)
+
+def iter_chunks(iterable, size: int):
+    """按固定大小分批"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        return 1
+
+    errors = []
+
+    def collect(offset, message):
+        errors.append(offset)
+        report_error(offset, message)
+
+    count = 0
+    try:
+        for _ in iter_messages(sys.argv[1], on_error=collect):
+            count += 1
+    except StreamError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ 共 {count} 条消息，{len(errors)} 条记录有错误")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+消息内容归一化（繁简统一、全角半角统一、大小写统一）
+
+入库时把归一化后的内容写入 messages.content_norm，搜索时对关键词做同样的处理，
+这样 "记录" 可以直接搜到 "記錄"、"ＡＰＩ" 可以搜到 "api"，只需一次查询
+（LIKE '%关键词%' 仍是全表扫描，content_norm 上没有可用的索引）。
+
+Usage:
+    python3 normalize.py --backfill                 # 为已有消息补写归一化内容（升级时已自动执行）
+    python3 normalize.py --backfill --rebuild       # 重新计算所有消息（映射表更新后使用）
+    python3 normalize.py "以下是音訊內容的逐字稿"      # 查看某段文本的归一化结果
+"""
+
+import argparse
+import sqlite3
+import sys
+import unicodedata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from init_db import DB_PATH, create_schema
+
+# 常用繁体字 -> 简体字（每两个字符为一组）
+# 只收录一对一且不会误伤简体文本的字，"乾"、"著"、"瞭" 等一简对多繁的字不做转换
+T2S_PAIRS = (
+    "這这個个們们來来時时會会說说説说為为爲为對对還还現现開开關关問问題题與与發发髮发後后過过動动種种"
+    "樣样機机點点學学國国東东車车長长門门間间實实經经當当總总從从內内兩两業业應应並并將将號号進进處处"
+    "數数無无體体變变義义區区響响記记錄录訊讯話话語语讀读寫写聽听講讲論论設设計计試试認认識识調调謝谢"
+    "請请讓让議议訂订評评詞词譯译課课該该誰谁誤误證证詳详談谈諸诸許许訪访訴诉詢询註注謂谓讚赞謎谜誠诚"
+    "誌志護护訓训託托誇夸詩诗誕诞謊谎譜谱訝讶詐诈誘诱諧谐謙谦謹谨譏讥譽誉資资費费貨货賣卖買买負负責责"
+    "賬账帳帐貼贴購购貴贵質质賽赛贏赢財财貢贡貿贸賀贺貝贝貧贫販贩賓宾賠赔賴赖贊赞貪贪貫贯貶贬賊贼賜赐"
+    "賦赋賭赌賺赚贈赠贓赃閉闭閱阅闊阔聞闻閃闪闖闯閒闲閣阁闡阐閘闸闢辟鐘钟鍾钟錯错錢钱銀银鍵键鏈链鎖锁"
+    "鏡镜針针鋼钢鐵铁銷销鋪铺鎮镇錶表釋释鑰钥錦锦鍋锅鑑鉴鑒鉴釘钉鈴铃鉛铅銅铜鋒锋鋁铝鍛锻鏟铲釣钓鈍钝"
+    "鈔钞鉤钩銳锐鋤锄鍊炼鍍镀鎊镑鏽锈鑄铸紀纪級级約约紅红紙纸純纯納纳紐纽線线組组細细終终結结給给統统"
+    "絡络絕绝維维綠绿網网綜综緒绪緊紧續续編编練练績绩縮缩繼继纜缆縣县繪绘織织緣缘緩缓締缔紹绍絲丝紛纷"
+    "紋纹綁绑綱纲緝缉縱纵繩绳糾纠紓纾絞绞綢绸綴缀緯纬縫缝繃绷繞绕纏缠馬马驗验駕驾騙骗驅驱驚惊騎骑驟骤"
+    "駁驳駐驻騷骚驢驴魚鱼鳥鸟鴨鸭雞鸡龍龙龜龟齊齐齒齿麥麦黃黄魯鲁鮮鲜鳴鸣鴻鸿鵝鹅鷹鹰鹽盐麗丽鯨鲸鴿鸽"
+    "鵬鹏鶴鹤頁页頂顶項项順顺須须預预領领頻频額额顏颜類类顧顾顯显頒颁頭头頸颈頰颊願愿顛颠頃顷頌颂頗颇"
+    "顆颗顫颤風风颱台飛飞飯饭飲饮館馆餘余養养饋馈飄飘飽饱飾饰餅饼餓饿飼饲餵喂饒饶陽阳陰阴陳陈陸陆隊队"
+    "階阶際际隨随險险隱隐陣阵陝陕隸隶隕陨軟软載载輕轻輸输轉转較较輪轮輯辑辦办辭辞邊边遠远運运達达選选"
+    "遺遗遲迟適适遞递連连週周遊游軍军軌轨輔辅輩辈輛辆辯辩遙遥軸轴輝辉轟轰辮辫迴回遜逊邁迈標标樹树橋桥"
+    "權权構构檔档檢检槍枪樂乐歡欢歷历曆历歲岁歸归殺杀氣气條条楊杨榮荣槓杠樓楼橫横檯台櫃柜歐欧毀毁樁桩"
+    "樸朴橢椭檸柠櫻樱欄栏欖榄殘残殼壳漢汉湯汤溝沟滿满測测濟济準准潔洁濕湿溼湿灣湾澤泽滅灭災灾決决況况"
+    "沒没濃浓溫温滬沪漁渔潛潜澀涩濾滤瀏浏氫氢氾泛洶汹渦涡湧涌滄沧滯滞滲渗漲涨漸渐潑泼澆浇濤涛濫滥濱滨"
+    "瀉泻灑洒灘滩烏乌熱热燈灯營营爭争爾尔牆墙狀状獨独獲获獎奖燒烧燦灿爛烂獄狱猶犹獻献煙烟煩烦燭烛爐炉"
+    "犧牺獅狮獵猎環环產产畫画異异療疗盡尽監监盤盘眾众衆众睜睁確确碼码礎础禮礼禍祸稱称穩稳積积窮穷競竞"
+    "筆笔範范節节簡简簽签籤签糧粮瑪玛璽玺瓊琼畢毕疊叠瘋疯癢痒皺皱盜盗矯矫碩硕礙碍祿禄禪禅離离稅税穀谷"
+    "窩窝竊窃築筑簾帘籃篮甕瓮癡痴瘡疮癥症皚皑盞盏睏困矚瞩磚砖祕秘禱祷穌稣窯窑竄窜竅窍筍笋箏筝簫箫聖圣"
+    "聯联聰聪職职聲声肅肃腦脑腳脚膽胆臉脸臨临舉举艱艰藝艺蘋苹萬万葉叶蓋盖蘭兰蟲虫術术衛卫衝冲補补裝装"
+    "製制複复襪袜罰罚罷罢羅罗習习翹翘聳耸脅胁脫脱腫肿膚肤興兴艙舱莊庄華华萊莱藥药虛虚虧亏蝦虾蠟蜡裡里"
+    "裏里褲裤襯衬罈坛羨羡聶聂脈脉膠胶臟脏髒脏艦舰芻刍莖茎蒼苍蔣蒋蔥葱蕭萧薦荐薩萨蘇苏虜虏蝕蚀螞蚂蠅蝇"
+    "蠶蚕襖袄見见規规視视覺觉親亲觀观覽览覓觅豐丰貓猫趕赶趨趋跡迹踐践躍跃農农郵邮鄉乡醫医醜丑採采鬆松"
+    "鬥斗鬧闹麼么黨党齡龄豈岂豎竖豬猪趙赵蹤踪鄰邻鄭郑醬酱釀酿踴踊躉趸醞酝億亿價价優优儀仪傳传傷伤僅仅"
+    "備备倆俩側侧偵侦偽伪債债傾倾僱雇儲储兒儿冊册凍冻別别刪删則则剛刚創创劃划劇剧劍剑劑剂勞劳勢势勵励"
+    "務务勝胜協协單单卻却廠厂廣广廢废廳厅參参雙双叢丛員员啟启啓启喚唤喪丧嗎吗嘆叹嚴严團团圓圆圖图圍围"
+    "場场塊块報报塵尘壓压壞坏壇坛壯壮夢梦夠够奪夺奮奋婦妇媽妈寧宁審审寶宝專专尋寻導导屆届層层屬属島岛"
+    "峽峡幣币師师帶带幫帮幹干廟庙張张強强彈弹徑径復复徵征徹彻戀恋恥耻悅悦惡恶愛爱慣惯態态憂忧憶忆懷怀"
+    "戰战戲戏戶户拋抛換换據据擁拥擇择擊击擔担擴扩擺摆攝摄敵敌斷断於于晝昼暫暂曉晓書书執执夥伙佈布佔占"
+    "併并傑杰僑侨儘尽兇凶凱凯劉刘勻匀匯汇彙汇厲厉嘗尝嚮向墊垫墳坟壺壶奧奥妝妆孫孙寬宽尷尴屍尸嶺岭恆恒"
+    "懶懒懸悬懼惧挾挟捨舍掃扫掛挂揀拣揮挥損损搖摇搶抢摟搂撐撑撥拨撫抚擋挡擠挤擬拟攜携攤摊敗败敘叙斂敛"
+    "暈晕曬晒朧胧電电霧雾靈灵靜静難难雖虽雜杂韌韧韓韩雛雏鬍胡鬢鬓黴霉齋斋麵面臺台係系繫系鬱郁隻只幾几"
+    "雲云庫库幀帧齣出鼕冬骯肮"
+)
+
+T2S_TABLE = str.maketrans({T2S_PAIRS[i]: T2S_PAIRS[i + 1] for i in range(0, len(T2S_PAIRS), 2)})
+
+def normalize_text(text: str) -> str:
+    """归一化文本：NFKC 全角转半角 -> 大小写折叠 -> 繁体转简体"""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).casefold().translate(T2S_TABLE)
+
+def backfill_rows(conn, batch_size: int = 1000, rebuild: bool = False, progress: bool = False):
+    """分批为 content_norm 为空（rebuild 时为全部）的消息写入归一化内容，每批提交一次"""
+    condition = '' if rebuild else 'AND content_norm IS NULL'
+    last_id = 0
+    updated = 0
+    while True:
+        rows = conn.execute(f'''
+            SELECT id, content FROM messages
+            WHERE id > ? {condition}
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        
+        conn.executemany(
+            'UPDATE messages SET content_norm = ? WHERE id = ?',
+            [(normalize_text(content), message_id) for message_id, content in rows]
+        )
+        conn.commit()
+        
+        last_id = rows[-1][0]
+        updated += len(rows)
+        if progress:
+            print(f"\r   已处理 {updated} 条", end="", flush=True)
+    if progress and updated:
+        print()
+    
+    return updated
+
+def backfill(batch_size: int = 1000, rebuild: bool = False):
+    """为已有消息补写 content_norm
+
+    create_schema() 在升级旧版数据库时已自动回填，这里主要用于映射表更新后的 --rebuild。
+    """
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    updated = backfill_rows(conn, batch_size=batch_size, rebuild=rebuild, progress=True)
+    conn.close()
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="消息内容归一化")
+    parser.add_argument("text", nargs="?", help="要归一化的文本")
+    parser.add_argument("--backfill", action="store_true", help="为已有消息补写归一化内容")
+    parser.add_argument("--rebuild", action="store_true", help="配合 --backfill，重新计算所有消息")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批处理的消息数")
+    args = parser.parse_args()
+    
+    if args.text:
+        print(normalize_text(args.text))
+        return 0
+    
+    if not args.backfill:
+        parser.print_help()
+        return 0
+    
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return 1
+    
+    print(f"🔤 补写归一化内容: {DB_PATH}")
+    count = backfill(batch_size=args.batch_size, rebuild=args.rebuild)
+    print(f"✅ 已更新 {count} 条消息")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
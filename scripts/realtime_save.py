@@ -7,17 +7,24 @@
 Usage:
     # 在对话结束时自动保存
     python3 realtime_save.py --session "agent:main:main" --limit 10
+
+    # 保存 sessions_history 导出文件（JSON 数组或 NDJSON，按批流式写入）
+    python3 realtime_save.py --session-key "agent:main:main" --message-file history.json
 """
 
 import sqlite3
-import json
 import sys
 import argparse
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH, init_db
+from init_db import DB_PATH, create_schema, init_db
+from normalize import normalize_text
+from segments import update_segments
+from terms import update_terms
+from auto_save import save_messages_batch
+from message_stream import StreamError, iter_chunks, iter_messages
 
 def should_save_message(content_parts):
     """判断是否应该保存这条消息"""
@@ -43,64 +50,86 @@ def save_single_message(session_key, session_name, msg):
         init_db()
     
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    try:
+        create_schema(conn)
+        cursor = conn.cursor()
     
-    # 检查是否已存在（避免重复保存）
-    timestamp = msg.get("timestamp", 0)
-    content = extract_text_content(msg.get("content", []))
+        # 检查是否已存在（避免重复保存）
+        timestamp = msg.get("timestamp", 0)
+        content = extract_text_content(msg.get("content", []))
     
-    if not content.strip():
-        conn.close()
-        return False
+        if not content.strip():
+            return False
     
-    cursor.execute('''
-        SELECT 1 FROM messages 
-        WHERE session_key = ? AND timestamp = ? AND content = ?
-    ''', (session_key, timestamp, content))
+        cursor.execute('''
+            SELECT 1 FROM messages 
+            WHERE session_key = ? AND timestamp = ? AND content = ?
+        ''', (session_key, timestamp, content))
     
-    if cursor.fetchone():
-        conn.close()
-        return False  # 已存在，跳过
+        if cursor.fetchone():
+            return False  # 已存在，跳过
     
-    # 插入新消息
-    dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute('''
-        INSERT INTO messages 
-        (session_key, session_name, timestamp, datetime, role, author, content, message_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        session_key,
-        session_name,
-        timestamp,
-        dt,
-        msg.get("role", "unknown"),
-        msg.get("author", ""),
-        content,
-        msg.get("messageId", "")
-    ))
+        # 插入新消息
+        dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute('''
+            INSERT INTO messages 
+            (session_key, session_name, timestamp, datetime, role, author, content, message_id, content_norm)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            session_key,
+            session_name,
+            timestamp,
+            dt,
+            msg.get("role", "unknown"),
+            msg.get("author", ""),
+            content,
+            msg.get("messageId", ""),
+            normalize_text(content)
+        ))
     
-    conn.commit()
-    conn.close()
-    return True
+        update_segments(conn)
+        update_terms(conn)
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+def save_message_file(session_key, session_name, filepath, chunk_size=500):
+    """流式读取消息文件并分批保存，返回 (读取条数, 保存条数)
+
+    无论文件里有几条消息都按 save_messages_batch 的规则过滤（排除系统消息和太短的回复）。
+    """
+    total = 0
+    saved = 0
+    for chunk in iter_chunks(iter_messages(filepath), chunk_size):
+        total += len(chunk)
+        saved += save_messages_batch(session_key, session_name, chunk)
+    return total, saved
 
 def main():
     parser = argparse.ArgumentParser(description="实时保存单条消息")
     parser.add_argument("--session-key", required=True, help="会话 key")
     parser.add_argument("--session-name", default="Unknown", help="会话名称")
-    parser.add_argument("--message-file", help="JSON 格式的消息文件")
+    parser.add_argument("--message-file", help="消息文件（单条消息、JSON 数组或 NDJSON）")
+    parser.add_argument("--chunk-size", type=int, default=500, help="每批保存的消息数")
     args = parser.parse_args()
     
     if args.message_file:
-        with open(args.message_file, 'r') as f:
-            msg = json.load(f)
-        if save_single_message(args.session_key, args.session_name, msg):
-            print("✅ 消息已保存")
+        try:
+            total, saved = save_message_file(
+                args.session_key, args.session_name, args.message_file, args.chunk_size
+            )
+        except StreamError as e:
+            print(f"❌ 消息文件格式错误: {e}")
+            return 1
+        if total == 1:
+            print("✅ 消息已保存" if saved else "⏭️ 消息已存在或无需保存")
         else:
-            print("⏭️ 消息已存在或无需保存")
+            print(f"✅ 读取 {total} 条消息，保存 {saved} 条")
     else:
         print("📌 使用说明:")
         print("  此脚本用于保存单条消息，通常由 Agent 自动调用")
         print("  参数: --session-key, --session-name, --message-file")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -18,50 +18,59 @@ from datetime import datetime
 
 # 添加父目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH, init_db
+from init_db import DB_PATH, create_schema, init_db
+from normalize import normalize_text
+from segments import update_segments
+from terms import update_terms
 
 # 尝试导入 OpenClaw 工具
 # 注意：实际运行时由 agent 调用 sessions_list/sessions_history
 def save_messages(session_key: str, session_name: str, messages: list):
     """保存消息到数据库"""
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    try:
+        create_schema(conn)
+        cursor = conn.cursor()
     
-    count = 0
-    for msg in messages:
-        timestamp = msg.get("timestamp", 0)
-        dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
+        count = 0
+        for msg in messages:
+            timestamp = msg.get("timestamp", 0)
+            dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
         
-        # 提取内容
-        content_parts = msg.get("content", [])
-        text_parts = []
-        for part in content_parts:
-            if isinstance(part, dict) and part.get("type") == "text":
-                text_parts.append(part.get("text", ""))
-        content = "\n".join(text_parts) if text_parts else ""
+            # 提取内容
+            content_parts = msg.get("content", [])
+            text_parts = []
+            for part in content_parts:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    text_parts.append(part.get("text", ""))
+            content = "\n".join(text_parts) if text_parts else ""
         
-        if not content.strip():
-            continue
+            if not content.strip():
+                continue
         
-        cursor.execute('''
-            INSERT OR IGNORE INTO messages 
-            (session_key, session_name, timestamp, datetime, role, author, content, message_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session_key,
-            session_name,
-            timestamp,
-            dt,
-            msg.get("role", "unknown"),
-            msg.get("author", ""),
-            content,
-            msg.get("messageId", "")
-        ))
-        count += 1
+            cursor.execute('''
+                INSERT OR IGNORE INTO messages 
+                (session_key, session_name, timestamp, datetime, role, author, content, message_id, content_norm)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                session_key,
+                session_name,
+                timestamp,
+                dt,
+                msg.get("role", "unknown"),
+                msg.get("author", ""),
+                content,
+                msg.get("messageId", ""),
+                normalize_text(content)
+            ))
+            count += 1
     
-    conn.commit()
-    conn.close()
-    return count
+        update_segments(conn)
+        update_terms(conn)
+        conn.commit()
+        return count
+    finally:
+        conn.close()
 
 def main():
     parser = argparse.ArgumentParser(description="保存聊天记录")
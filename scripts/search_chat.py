@@ -7,33 +7,40 @@ Usage:
     python3 search_chat.py "API设计" --days 7  # 搜索最近7天
     python3 search_chat.py "数据库" --limit 20 # 显示前20条结果
     python3 search_chat.py "会议" --export results.md
+    python3 search_chat.py 部署 告警 --follow  # 持续监听新消息，命中输出 NDJSON
 """
 
 import argparse
+import json
 import sqlite3
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH
+from init_db import DB_PATH, create_schema, get_meta, set_meta
+from normalize import normalize_text
 
-def search_messages(
+FOLLOW_BATCH_SIZE = 500
+
+def build_search_query(
     keyword: str,
     days: int = None,
     session_key: str = None,
-    limit: int = 50
+    limit: int = 50,
+    before: tuple = None
 ):
-    """搜索消息"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
+    """构造搜索 SQL，返回 (query, params)；limit 为 None 时不限制数量
+
+    结果按 (timestamp, id) 倒序；before 为上一页最后一条的 (timestamp, id)，
+    用于逐页查询（每页都是独立的短查询，不需要在页之间保持游标）。
+    """
     query = '''
         SELECT * FROM messages 
-        WHERE content LIKE ?
+        WHERE content_norm LIKE ?
     '''
-    params = [f'%{keyword}%']
+    params = [f'%{normalize_text(keyword)}%']
     
     if days:
         since = datetime.now() - timedelta(days=days)
@@ -45,15 +52,113 @@ def search_messages(
         query += ' AND session_key = ?'
         params.append(session_key)
     
-    query += ' ORDER BY timestamp DESC LIMIT ?'
-    params.append(limit)
+    if before:
+        query += ' AND (timestamp, id) < (?, ?)'
+        params.extend(before)
+    
+    query += ' ORDER BY timestamp DESC, id DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    
+    return query, params
+
+def search_messages(
+    keyword: str,
+    days: int = None,
+    session_key: str = None,
+    limit: int = 50
+):
+    """搜索消息"""
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
     
+    query, params = build_search_query(keyword, days, session_key, limit)
     cursor.execute(query, params)
     results = [dict(row) for row in cursor.fetchall()]
     conn.close()
     
     return results
 
+def match_keywords(content_norm: str, keywords: list) -> list:
+    """返回归一化内容中命中的关键词（繁简、全半角、大小写不敏感）"""
+    return [kw for kw in keywords if normalize_text(kw) in content_norm]
+
+def follow_messages(
+    keywords: list,
+    cursor_name: str = "default",
+    session_key: str = None,
+    interval: float = 0.5,
+    from_start: bool = False,
+    out=sys.stdout
+):
+    """监听新消息，将命中关键词的消息以 NDJSON 输出
+
+    游标为已处理的最大消息 id，保存在 archive_meta 中（follow:<cursor_name>），
+    重启后从上次位置继续。只有在 PRAGMA data_version 变化（即其他连接提交了写入）时才读取新消息。
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    create_schema(conn)
+    
+    meta_key = f"follow:{cursor_name}"
+    position = get_meta(conn, meta_key)
+    if position is None:
+        if from_start:
+            position = 0
+        else:
+            row = conn.execute('SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()
+            position = row[0]
+        set_meta(conn, meta_key, position)
+        conn.commit()
+    position = int(position)
+    
+    last_version = None
+    try:
+        while True:
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if version == last_version:
+                time.sleep(interval)
+                continue
+            
+            rows = conn.execute('''
+                SELECT * FROM messages
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (position, FOLLOW_BATCH_SIZE)).fetchall()
+            
+            if not rows:
+                last_version = version
+                continue
+            
+            for row in rows:
+                if session_key and row['session_key'] != session_key:
+                    continue
+                content_norm = row['content_norm'] or normalize_text(row['content'])
+                hits = match_keywords(content_norm, keywords)
+                if not hits:
+                    continue
+                record = {key: row[key] for key in row.keys() if key not in ('created_at', 'content_norm')}
+                record['keywords'] = hits
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            
+            # 输出之后再推进游标，重启时不会漏掉消息
+            position = rows[-1]['id']
+            set_meta(conn, meta_key, position)
+            conn.commit()
+            
+            # 批次已满说明还有积压，不等待直接继续读取
+            if len(rows) < FOLLOW_BATCH_SIZE:
+                last_version = version
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
 def format_result(msg: dict, index: int) -> str:
     """格式化搜索结果"""
     return f"""
@@ -80,18 +185,37 @@ def export_to_markdown(results: list, filepath: str):
 
 def main():
     parser = argparse.ArgumentParser(description="搜索聊天记录")
-    parser.add_argument("keyword", help="搜索关键词")
+    parser.add_argument("keywords", nargs="+", metavar="keyword", help="搜索关键词（--follow 模式可指定多个）")
     parser.add_argument("--days", type=int, help="搜索最近 N 天")
     parser.add_argument("--session", type=str, help="指定会话")
     parser.add_argument("--limit", type=int, default=50, help="结果数量限制")
     parser.add_argument("--export", type=str, help="导出到文件 (.md)")
+    parser.add_argument("--follow", action="store_true", help="持续监听新消息，命中时输出 NDJSON")
+    parser.add_argument("--cursor", type=str, default="default", help="--follow 模式的游标名称")
+    parser.add_argument("--interval", type=float, default=0.5, help="--follow 模式的轮询间隔（秒）")
+    parser.add_argument("--from-start", action="store_true", help="--follow 首次运行时从第一条消息开始读取")
     args = parser.parse_args()
     
     if not DB_PATH.exists():
-        print(f"❌ 数据库不存在: {DB_PATH}")
-        print("请先运行: python3 init_db.py")
+        print(f"❌ 数据库不存在: {DB_PATH}", file=sys.stderr)
+        print("请先运行: python3 init_db.py", file=sys.stderr)
         return 1
     
+    if args.follow:
+        print(f"👀 监听关键词: {', '.join(args.keywords)}（Ctrl+C 退出）", file=sys.stderr)
+        follow_messages(
+            keywords=args.keywords,
+            cursor_name=args.cursor,
+            session_key=args.session,
+            interval=args.interval,
+            from_start=args.from_start
+        )
+        return 0
+    
+    if len(args.keywords) > 1:
+        parser.error("普通搜索只支持一个关键词，多个关键词请配合 --follow 使用")
+    args.keyword = args.keywords[0]
+    
     print(f"🔍 搜索: '{args.keyword}'")
     if args.days:
         print(f"📅 时间范围: 最近 {args.days} 天")
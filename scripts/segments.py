@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+对话分段：按空闲间隔把每个会话切分成一段段对话
+
+Usage:
+    python3 segments.py                       # 列出最近的对话段
+    python3 segments.py --days 1              # 列出最近1天的对话段
+    python3 segments.py --session KEY         # 只看指定会话
+    python3 segments.py --rebuild --gap 45    # 以45分钟为间隔重建分段
+
+配合 export_chat.py --segment <id> 导出某一段对话。
+分段 id 不是永久的：迟到的消息把两段连起来时会合并成一段（保留较早一段的 id），
+重建分段后 id 也会重新分配，导出前请先重新列出。
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+from init_db import DB_PATH, create_schema, get_meta, set_meta
+
+# 默认空闲间隔（分钟），超过该间隔视为新的一段对话
+DEFAULT_GAP_MINUTES = 30
+
+GAP_KEY = "segments:gap_ms"
+CURSOR_KEY = "segments:last_id"
+VERSION_KEY = "segments:version"
+# 分段规则（如参与者的取法）变化时递增，已有分段会在下次更新时自动重建
+SEGMENTS_VERSION = 2
+
+# auto_save 在消息没有作者时写入的占位值
+AUTHOR_PLACEHOLDER = "system"
+
+def format_ts(timestamp: int) -> str:
+    """毫秒时间戳转可读时间"""
+    return datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+def participant_name(author: str, role: str) -> str:
+    """消息的参与者：有真实作者时用作者，否则用角色（user / assistant）"""
+    if author and author != AUTHOR_PLACEHOLDER:
+        return author
+    return role or author
+
+def add_message(conn, gap_ms: int, session_key: str, session_name: str, timestamp: int, participant: str):
+    """把一条消息并入分段：落在已有分段间隔内则扩展，跨越多个分段则合并"""
+    rows = conn.execute('''
+        SELECT id, start_ts, end_ts, message_count, participants FROM segments
+        WHERE session_key = ? AND end_ts >= ? AND start_ts <= ?
+        ORDER BY start_ts
+    ''', (session_key, timestamp - gap_ms, timestamp + gap_ms)).fetchall()
+
+    if not rows:
+        conn.execute('''
+            INSERT INTO segments
+            (session_key, session_name, start_ts, end_ts, start_datetime, end_datetime, message_count, participants)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+        ''', (
+            session_key,
+            session_name,
+            timestamp,
+            timestamp,
+            format_ts(timestamp),
+            format_ts(timestamp),
+            json.dumps([participant], ensure_ascii=False)
+        ))
+        return
+
+    start_ts = min([timestamp] + [row[1] for row in rows])
+    end_ts = max([timestamp] + [row[2] for row in rows])
+    count = 1 + sum(row[3] for row in rows)
+    participants = {participant}
+    for row in rows:
+        participants.update(json.loads(row[4] or "[]"))
+
+    keep_id = rows[0][0]
+    conn.execute('''
+        UPDATE segments
+        SET session_name = COALESCE(?, session_name), start_ts = ?, end_ts = ?,
+            start_datetime = ?, end_datetime = ?, message_count = ?, participants = ?
+        WHERE id = ?
+    ''', (
+        session_name or None,
+        start_ts,
+        end_ts,
+        format_ts(start_ts),
+        format_ts(end_ts),
+        count,
+        json.dumps(sorted(participants), ensure_ascii=False),
+        keep_id
+    ))
+    merged_ids = [row[0] for row in rows[1:]]
+    if merged_ids:
+        conn.executemany('DELETE FROM segments WHERE id = ?', [(i,) for i in merged_ids])
+
+def update_segments(conn, gap_minutes: int = None, batch_size: int = 1000):
+    """增量处理上次之后新增的消息（不提交，由调用方决定事务边界）
+
+    传入与当前不同的 gap_minutes 或分段规则版本变化时会清空并重建全部分段。
+    返回本次处理的消息数。
+    """
+    stored_gap = get_meta(conn, GAP_KEY)
+    gap_ms = int(stored_gap) if stored_gap else DEFAULT_GAP_MINUTES * 60 * 1000
+    if gap_minutes is not None and gap_minutes * 60 * 1000 != gap_ms:
+        gap_ms = gap_minutes * 60 * 1000
+        conn.execute('DELETE FROM segments')
+        set_meta(conn, CURSOR_KEY, 0)
+    if int(get_meta(conn, VERSION_KEY, 1)) != SEGMENTS_VERSION:
+        conn.execute('DELETE FROM segments')
+        set_meta(conn, CURSOR_KEY, 0)
+        set_meta(conn, VERSION_KEY, SEGMENTS_VERSION)
+    if stored_gap is None or int(stored_gap) != gap_ms:
+        set_meta(conn, GAP_KEY, gap_ms)
+
+    last_id = int(get_meta(conn, CURSOR_KEY, 0))
+    processed = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, session_key, session_name, timestamp, role, author FROM messages
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        for message_id, session_key, session_name, timestamp, role, author in rows:
+            add_message(conn, gap_ms, session_key, session_name, timestamp, participant_name(author, role))
+        last_id = rows[-1][0]
+        processed += len(rows)
+
+    if processed:
+        set_meta(conn, CURSOR_KEY, last_id)
+    return processed
+
+def list_segments(days: int = None, session_key: str = None, limit: int = 50):
+    """列出对话段（按开始时间倒序）"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    query = 'SELECT * FROM segments WHERE 1=1'
+    params = []
+
+    if days:
+        since = datetime.now() - timedelta(days=days)
+        timestamp = int(since.timestamp() * 1000)
+        query += ' AND end_ts > ?'
+        params.append(timestamp)
+
+    if session_key:
+        query += ' AND session_key = ?'
+        params.append(session_key)
+
+    query += ' ORDER BY start_ts DESC LIMIT ?'
+    params.append(limit)
+
+    cursor.execute(query, params)
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    for segment in results:
+        segment['participants'] = json.loads(segment['participants'] or "[]")
+    return results
+
+def get_segment(segment_id: int):
+    """按 id 获取对话段"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute('SELECT * FROM segments WHERE id = ?', (segment_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def main():
+    parser = argparse.ArgumentParser(description="列出对话段")
+    parser.add_argument("--days", type=int, help="最近 N 天")
+    parser.add_argument("--session", type=str, help="指定会话")
+    parser.add_argument("--limit", type=int, default=50, help="结果数量限制")
+    parser.add_argument("--rebuild", action="store_true", help="清空并重建全部分段")
+    parser.add_argument("--gap", type=int, help=f"空闲间隔分钟数（默认{DEFAULT_GAP_MINUTES}）")
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return 1
+
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    if args.rebuild:
+        conn.execute('DELETE FROM segments')
+        set_meta(conn, CURSOR_KEY, 0)
+    processed = update_segments(conn, gap_minutes=args.gap)
+    conn.commit()
+    conn.close()
+    if args.rebuild or processed:
+        print(f"🧩 已分段 {processed} 条消息")
+
+    segments = list_segments(days=args.days, session_key=args.session, limit=args.limit)
+    if not segments:
+        print("没有找到对话段。")
+        return 0
+
+    for segment in segments:
+        start = segment['start_datetime']
+        end = segment['end_datetime'][11:16] if segment['end_datetime'][:10] == start[:10] else segment['end_datetime'][:16]
+        print(f"[{segment['id']}] {start[:16]} ~ {end} | {segment.get('session_name') or 'Unknown'}")
+        print(f"    {segment['message_count']} 条消息，参与者: {', '.join(segment['participants'])}")
+
+    print("\n💡 分段合并或重建后 id 会变化，导出前请以最新列出的 id 为准")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
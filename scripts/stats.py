@@ -4,24 +4,23 @@
 
 Usage:
     python3 stats.py
+    python3 stats.py --trends                 # 最近7天出现最多的词
+    python3 stats.py --trends --days 30 --top 50
+    python3 stats.py --trends --term 部署 --days 30   # 某个词的每日次数
 """
 
+import argparse
 import sqlite3
 import sys
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
-from init_db import DB_PATH
+from init_db import DB_PATH, create_schema
+from terms import top_terms, term_series, term_tokens, update_terms
 
-def get_stats():
-    """获取统计信息"""
-    if not DB_PATH.exists():
-        print(f"❌ 数据库不存在: {DB_PATH}")
-        print("请先运行: python3 init_db.py")
-        return
-    
-    conn = sqlite3.connect(DB_PATH)
+def collect_stats(conn) -> dict:
+    """收集统计信息"""
     cursor = conn.cursor()
     
     # 总消息数
@@ -59,6 +58,25 @@ def get_stats():
     ''')
     top_sessions = cursor.fetchall()
     
+    return {
+        "total": total,
+        "sessions": sessions,
+        "earliest": earliest,
+        "latest": latest,
+        "today_count": today_count,
+        "role_stats": [tuple(row) for row in role_stats],
+        "top_sessions": [tuple(row) for row in top_sessions]
+    }
+
+def get_stats():
+    """获取统计信息"""
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return
+    
+    conn = sqlite3.connect(DB_PATH)
+    stats = collect_stats(conn)
     conn.close()
     
     # 打印统计
@@ -67,22 +85,71 @@ def get_stats():
     print("=" * 60)
     print(f"\n💾 数据库: {DB_PATH}")
     print(f"\n📈 总体统计:")
-    print(f"   总消息数: {total:,}")
-    print(f"   会话数量: {sessions}")
-    print(f"   今日消息: {today_count}")
-    if earliest and latest:
-        print(f"   时间范围: {earliest} ~ {latest}")
+    print(f"   总消息数: {stats['total']:,}")
+    print(f"   会话数量: {stats['sessions']}")
+    print(f"   今日消息: {stats['today_count']}")
+    if stats['earliest'] and stats['latest']:
+        print(f"   时间范围: {stats['earliest']} ~ {stats['latest']}")
     
     print(f"\n👤 角色分布:")
-    for role, count in role_stats:
+    for role, count in stats['role_stats']:
         print(f"   {role}: {count:,}")
     
     print(f"\n🏆 消息最多的会话:")
-    for name, count in top_sessions:
+    for name, count in stats['top_sessions']:
         name = name or "Unknown"
         print(f"   {name}: {count:,}")
     
     print("\n" + "=" * 60)
 
+def get_trends(days: int = 7, top: int = 20, term: str = None, session_key: str = None):
+    """从词频索引查询热词或某个词的每日趋势"""
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return
+    
+    # 先补齐索引中尚未统计的消息（通常为0条）
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    update_terms(conn)
+    conn.commit()
+    
+    print("=" * 60)
+    if term and not term_tokens(term):
+        print(f"⚠️ \"{term}\" 不会被词频索引统计（中文至少两个字，且不能是 \"我们\"、\"的是\" 这类停用词），无法查询趋势")
+    elif term:
+        series = term_series(conn, term, days=days, session_key=session_key)
+        print(f"📈 \"{term}\" 最近 {days} 天每日次数")
+        print("=" * 60)
+        for day, count, messages in series:
+            print(f"   {day}: {count:,} 次（{messages:,} 条消息）")
+        if not series:
+            print("   没有记录")
+    else:
+        terms = top_terms(conn, days=days, session_key=session_key, limit=top)
+        print(f"🔥 最近 {days} 天热词 Top {top}")
+        print("=" * 60)
+        for i, (name, count, messages) in enumerate(terms, 1):
+            print(f"   {i:>3}. {name}: {count:,} 次（{messages:,} 条消息）")
+        if not terms:
+            print("   没有记录")
+    print("=" * 60)
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="查看聊天记录存档统计")
+    parser.add_argument("--trends", action="store_true", help="查看热词 / 词频趋势")
+    parser.add_argument("--term", type=str, help="配合 --trends，查看某个词的每日次数")
+    parser.add_argument("--days", type=int, default=7, help="统计最近 N 天（默认7）")
+    parser.add_argument("--top", type=int, default=20, help="热词数量（默认20）")
+    parser.add_argument("--session", type=str, help="指定会话（仅统计未压缩的日期）")
+    args = parser.parse_args()
+    
+    if args.trends:
+        get_trends(days=args.days, top=args.top, term=args.term, session_key=args.session)
+    else:
+        get_stats()
+
 if __name__ == "__main__":
-    get_stats()
+    main()
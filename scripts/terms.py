@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+词频索引：入库时按 (日期, 会话) 统计词和汉字二元组，供 stats.py --trends 查询
+
+英文/数字按单词切分，中文按相邻两个汉字切分（"部署上线" -> 部署、署上、上线）。
+统计基于归一化内容，繁简体计入同一个词。
+
+Usage:
+    python3 terms.py --rebuild      # 清空并重建词频索引
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+from init_db import DB_PATH, create_schema, get_meta, set_meta
+from normalize import normalize_text
+
+# 超过该天数的词频压缩为不分会话的汇总，并丢弃低频词
+COMPACT_AFTER_DAYS = 90
+COMPACT_MIN_COUNT = 2
+
+CURSOR_KEY = "terms:last_id"
+COMPACTED_KEY = "terms:compacted_through"
+TOKENIZER_KEY = "terms:tokenizer"
+# 切词规则变化时递增，已有索引会在下次更新时自动重建
+TOKENIZER_VERSION = 2
+# 压缩后的汇总行使用的会话标识
+ALL_SESSIONS = "*"
+
+CJK_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+')
+WORD = re.compile(r'[a-z0-9_]*[a-z][a-z0-9_]*')
+
+# 没有主题意义的二元组不计入。只按完整二元组过滤，
+# 不按单字过滤，否则 "会议"、"需要"、"现在"、"没有"、"在线" 这类词也会被丢掉
+STOP_BIGRAMS = {
+    "我们", "你们", "他们", "她们", "它们", "咱们", "大家", "自己",
+    "这个", "那个", "这样", "那样", "这些", "那些", "这里", "那里", "什么", "怎么",
+    "的是", "的话", "的时", "了吗", "了吧", "了呢", "了的", "是的", "是不", "不是",
+    "就是", "还是", "也是", "都是", "但是", "可是", "而且", "然后", "因为", "所以",
+    "如果", "已经", "一个", "一下", "一些", "可以", "我的", "你的", "他的", "她的",
+    "我在", "你在", "我也", "你也", "好的", "对的", "嗯嗯", "哈哈",
+}
+STOP_WORDS = {
+    "the", "and", "to", "of", "is", "in", "it", "that", "for", "on", "with",
+    "as", "be", "this", "are", "was", "or", "an", "at", "by", "we", "you",
+}
+
+def tokenize(text_norm: str) -> list:
+    """把归一化文本切分为词列表（可重复）"""
+    tokens = []
+    for run in CJK_RUN.findall(text_norm):
+        for i in range(len(run) - 1):
+            bigram = run[i:i + 2]
+            if bigram not in STOP_BIGRAMS:
+                tokens.append(bigram)
+    for word in WORD.findall(text_norm):
+        if len(word) >= 2 and word not in STOP_WORDS:
+            tokens.append(word)
+    return tokens
+
+def term_tokens(term: str) -> list:
+    """查询词对应的索引词（去重保持顺序）
+
+    单个汉字、停用词等不会被索引，返回空列表。
+    """
+    return list(dict.fromkeys(tokenize(normalize_text(term))))
+
+def reset_terms(conn):
+    """清空词频索引，下次 update_terms() 时从头统计（不提交）"""
+    conn.execute('DELETE FROM term_counts')
+    set_meta(conn, CURSOR_KEY, 0)
+    set_meta(conn, COMPACTED_KEY, "")
+    set_meta(conn, TOKENIZER_KEY, TOKENIZER_VERSION)
+
+def compact_terms(conn, through_day: str):
+    """把 through_day 及之前、尚未压缩的日期合并为汇总行（不提交）"""
+    compacted = get_meta(conn, COMPACTED_KEY, "")
+    if through_day <= compacted:
+        return
+
+    conn.execute('''
+        INSERT INTO term_counts (day, session_key, term, count, messages)
+        SELECT day, ?, term, SUM(count), SUM(messages) FROM term_counts
+        WHERE day > ? AND day <= ? AND session_key != ?
+        GROUP BY day, term
+        HAVING SUM(count) >= ?
+        ON CONFLICT(day, session_key, term) DO UPDATE SET
+            count = count + excluded.count,
+            messages = messages + excluded.messages
+    ''', (ALL_SESSIONS, compacted, through_day, ALL_SESSIONS, COMPACT_MIN_COUNT))
+    conn.execute('''
+        DELETE FROM term_counts
+        WHERE day > ? AND day <= ? AND session_key != ?
+    ''', (compacted, through_day, ALL_SESSIONS))
+    set_meta(conn, COMPACTED_KEY, through_day)
+
+def update_terms(conn, batch_size: int = 1000):
+    """统计上次之后新增消息的词频，并压缩过期日期（不提交，由调用方决定事务边界）
+
+    切词规则版本变化时先清空重建。返回本次处理的消息数。
+    """
+    if int(get_meta(conn, TOKENIZER_KEY, 1)) != TOKENIZER_VERSION:
+        reset_terms(conn)
+
+    through_day = (datetime.now() - timedelta(days=COMPACT_AFTER_DAYS)).strftime("%Y-%m-%d")
+    compacted = get_meta(conn, COMPACTED_KEY, "")
+
+    last_id = int(get_meta(conn, CURSOR_KEY, 0))
+    processed = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, session_key, datetime, content, content_norm FROM messages
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+
+        counts = Counter()
+        messages = Counter()
+        for message_id, session_key, dt, content, content_norm in rows:
+            day = dt[:10]
+            # 已压缩的日期直接计入汇总行
+            if day <= compacted:
+                session_key = ALL_SESSIONS
+            tokens = Counter(tokenize(content_norm or normalize_text(content)))
+            for term, count in tokens.items():
+                counts[(day, session_key, term)] += count
+                messages[(day, session_key, term)] += 1
+
+        conn.executemany('''
+            INSERT INTO term_counts (day, session_key, term, count, messages)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(day, session_key, term) DO UPDATE SET
+                count = count + excluded.count,
+                messages = messages + excluded.messages
+        ''', [key + (count, messages[key]) for key, count in counts.items()])
+
+        last_id = rows[-1][0]
+        processed += len(rows)
+
+    if processed:
+        set_meta(conn, CURSOR_KEY, last_id)
+    compact_terms(conn, through_day)
+    return processed
+
+def since_day(days: int) -> str:
+    """最近 N 天（含今天）的起始日期"""
+    return (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+def top_terms(conn, days: int = 7, session_key: str = None, limit: int = 20):
+    """最近 N 天出现次数最多的词，返回 [(词, 次数, 消息数)]
+
+    指定会话时只统计未压缩的日期。
+    """
+    query = '''
+        SELECT term, SUM(count), SUM(messages) FROM term_counts
+        WHERE day >= ?
+    '''
+    params = [since_day(days)]
+    if session_key:
+        query += ' AND session_key = ?'
+        params.append(session_key)
+    query += ' GROUP BY term ORDER BY SUM(count) DESC LIMIT ?'
+    params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+def term_series(conn, term: str, days: int = 30, session_key: str = None):
+    """某个词最近 N 天的每日次数，返回 [(日期, 次数, 消息数)]
+
+    只有单个词或两个汉字会被直接索引；更长的中文词取其各二元组每日次数的最小值，
+    结果是实际次数的上界。没有可查询的索引词时返回空列表（见 term_tokens）。
+    """
+    tokens = term_tokens(term)
+    if not tokens:
+        return []
+
+    placeholders = ', '.join('?' for _ in tokens)
+    query = f'''
+        SELECT day, term, SUM(count), SUM(messages) FROM term_counts
+        WHERE term IN ({placeholders}) AND day >= ?
+    '''
+    params = tokens + [since_day(days)]
+    if session_key:
+        query += ' AND session_key = ?'
+        params.append(session_key)
+    query += ' GROUP BY day, term'
+
+    by_day = {}
+    for day, token, count, messages in conn.execute(query, params):
+        by_day.setdefault(day, {})[token] = (count, messages)
+
+    series = []
+    for day in sorted(by_day):
+        if len(by_day[day]) < len(tokens):
+            continue
+        series.append((
+            day,
+            min(count for count, _ in by_day[day].values()),
+            min(messages for _, messages in by_day[day].values())
+        ))
+    return series
+
+def main():
+    parser = argparse.ArgumentParser(description="词频索引")
+    parser.add_argument("--rebuild", action="store_true", help="清空并重建词频索引")
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        print(f"❌ 数据库不存在: {DB_PATH}")
+        print("请先运行: python3 init_db.py")
+        return 1
+
+    conn = sqlite3.connect(DB_PATH)
+    create_schema(conn)
+    if args.rebuild:
+        reset_terms(conn)
+    processed = update_terms(conn)
+    conn.commit()
+    conn.close()
+
+    print(f"✅ 词频索引已更新，处理 {processed} 条消息")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from message_stream import MAX_RECORD, StreamError, iter_messages
+
+def make_message(i: int) -> dict:
+    return {
+        "role": "user",
+        "timestamp": 1700000000000 + i,
+        "content": [{"type": "text", "text": f"第 {i} 条消息，带 \"引号\" 和 \\ 反斜杠"}],
+    }
+
+def collect(path):
+    errors = []
+    messages = list(iter_messages(str(path), on_error=lambda offset, message: errors.append(offset)))
+    return messages, errors
+
+def test_large_single_line_array(tmp_path):
+    messages = [make_message(i) for i in range(50000)]
+    path = tmp_path / "history.json"
+    # 整个数组在同一行，末尾带换行
+    path.write_text(json.dumps(messages, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    assert collect(path) == (messages, [])
+
+def test_pretty_printed_array(tmp_path):
+    messages = [make_message(i) for i in range(100)]
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps(messages, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    assert collect(path) == (messages, [])
+
+def test_record_larger_than_fast_path(tmp_path):
+    big = make_message(0)
+    big["content"][0]["text"] = "长" * MAX_RECORD
+    messages = [make_message(1), big, make_message(2)]
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps(messages, ensure_ascii=False), encoding="utf-8")
+
+    assert collect(path) == (messages, [])
+
+def test_array_bad_record_reports_offset(tmp_path):
+    good = json.dumps(make_message(0), ensure_ascii=False)
+    bad = '{"role": "user", "content": oops}'
+    data = f"[{good}, {bad}, 42, {good}]"
+    path = tmp_path / "history.json"
+    path.write_text(data, encoding="utf-8")
+
+    parsed, errors = collect(path)
+    assert parsed == [make_message(0), make_message(0)]
+    encoded = data.encode("utf-8")
+    assert errors == [encoded.index(bad.encode("utf-8")), encoded.index(b"42")]
+
+def test_array_missing_separator(tmp_path):
+    path = tmp_path / "history.json"
+    path.write_text('[{"role": "user"} {"role": "user"}]', encoding="utf-8")
+
+    with pytest.raises(StreamError) as info:
+        collect(path)
+    assert info.value.offset == len('[{"role": "user"} ')
+
+def test_ndjson_skips_bad_lines(tmp_path):
+    lines = [
+        json.dumps(make_message(0), ensure_ascii=False),
+        '{"role": broken',
+        '"not an object"',
+        json.dumps(make_message(1), ensure_ascii=False),
+        json.dumps(make_message(2), ensure_ascii=False),
+    ]
+    path = tmp_path / "history.ndjson"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    parsed, errors = collect(path)
+    assert parsed == [make_message(0), make_message(1), make_message(2)]
+    assert len(errors) == 2
+
+def test_ndjson_many_truncated_lines(tmp_path):
+    lines = []
+    expected = []
+    for i in range(2000):
+        line = json.dumps(make_message(i), ensure_ascii=False)
+        if i % 10 == 0:
+            # 截断在字符串或数组中间，括号和引号都没有闭合
+            lines.append(line[:len(line) // 2])
+        else:
+            lines.append(line)
+            expected.append(make_message(i))
+    path = tmp_path / "history.ndjson"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    parsed, errors = collect(path)
+    assert parsed == expected
+    assert len(errors) == 200
+
+def test_ndjson_truncated_line_does_not_swallow_next_lines(tmp_path):
+    good = json.dumps(make_message(0), ensure_ascii=False)
+    # 截断行的 '[' 会和第三行的 ']}' 配对，但每条记录只能在自己那一行内结束
+    data = f'{good}\n{{"content": [\n{good}\n]}}\n{good}\n'
+    path = tmp_path / "history.ndjson"
+    path.write_text(data, encoding="utf-8")
+
+    parsed, errors = collect(path)
+    assert parsed == [make_message(0)] * 3
+    assert len(errors) == 2
+
+def test_single_pretty_printed_object(tmp_path):
+    path = tmp_path / "message.json"
+    path.write_text(json.dumps(make_message(0), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    assert collect(path) == ([make_message(0)], [])